@@ -1,7 +1,9 @@
 import os
-import re
+import shutil
+import struct
 import datetime
-from typing import Optional, Tuple
+from functools import lru_cache
+from typing import Dict, Optional, Set, Tuple
 from PIL import Image
 import ctypes
 from ctypes import wintypes
@@ -9,29 +11,391 @@ from ctypes import wintypes
 # Windows Time Structs
 kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
 
+# Explicit signatures let ctypes skip per-call argument inference and keep HANDLE 64-bit safe.
+kernel32.CreateFileW.argtypes = [
+    wintypes.LPCWSTR, wintypes.DWORD, wintypes.DWORD, ctypes.c_void_p,
+    wintypes.DWORD, wintypes.DWORD, wintypes.HANDLE,
+]
+kernel32.CreateFileW.restype = wintypes.HANDLE
+kernel32.SetFileTime.argtypes = [
+    wintypes.HANDLE, ctypes.POINTER(wintypes.FILETIME),
+    ctypes.POINTER(wintypes.FILETIME), ctypes.POINTER(wintypes.FILETIME),
+]
+kernel32.SetFileTime.restype = wintypes.BOOL
+kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+kernel32.CloseHandle.restype = wintypes.BOOL
+
 FILE_WRITE_ATTRIBUTES = 0x0100
 OPEN_EXISTING = 3
+INVALID_HANDLE_VALUE = wintypes.HANDLE(-1).value
+
+# Filename date scanner (no regex). Recognised shapes, most precise first:
+# - full: YYYYMMDD[HHMM[SS]] and separated variants like YYYY-MM-DD 20.35.25
+# - year-month: YYYY-MM (no day)
+# - year: YYYY only
+# Optional separators are tried "consume first, then skip", the same order a
+# greedy regex would backtrack in, so ambiguous names resolve identically.
+_DATE_SEPARATORS = "-_. "
+_TIME_LEAD_SEPARATORS = "T _.-"
+_TIME_SEPARATORS = ":._-"
+
+
+def _is_digit_at(s: str, i: int) -> bool:
+    return i < len(s) and s[i].isdecimal()
+
+
+def _separator_options(s: str, i: int, separators: str) -> Tuple[int, ...]:
+    return (1, 0) if i < len(s) and s[i] in separators else (0,)
+
+
+def _is_month_at(s: str, i: int) -> bool:
+    # 0[1-9]|1[0-2]
+    if i + 1 >= len(s):
+        return False
+    c0, c1 = s[i], s[i + 1]
+    return (c0 == "0" and "1" <= c1 <= "9") or (c0 == "1" and "0" <= c1 <= "2")
+
+
+def _is_day_at(s: str, i: int) -> bool:
+    # 0[1-9]|[12]\d|3[01]
+    if i + 1 >= len(s):
+        return False
+    c0, c1 = s[i], s[i + 1]
+    if c0 == "0":
+        return "1" <= c1 <= "9"
+    if c0 == "1" or c0 == "2":
+        return c1.isdecimal()
+    return c0 == "3" and (c1 == "0" or c1 == "1")
 
-def unique_destination_path(directory: str, filename: str) -> str:
-    base, ext = os.path.splitext(filename)
-    candidate = os.path.join(directory, filename)
-    if not os.path.exists(candidate):
-        return candidate
-    i = 2
-    while True:
-        candidate = os.path.join(directory, f"{base} ({i}){ext}")
-        if not os.path.exists(candidate):
-            return candidate
-        i += 1
-
-def set_file_creation_time(path: str, timestamp: float):
+
+def _is_hour_at(s: str, i: int) -> bool:
+    # [01]\d|2[0-3]
+    if i + 1 >= len(s):
+        return False
+    c0, c1 = s[i], s[i + 1]
+    if c0 == "0" or c0 == "1":
+        return c1.isdecimal()
+    return c0 == "2" and "0" <= c1 <= "3"
+
+
+def _is_minute_at(s: str, i: int) -> bool:
+    # [0-5]\d
+    return i + 1 < len(s) and "0" <= s[i] <= "5" and s[i + 1].isdecimal()
+
+
+def _is_year_at(s: str, i: int) -> bool:
+    # (?<!\d)(?:19|20)\d{2}
+    if i + 3 >= len(s) or (i > 0 and s[i - 1].isdecimal()):
+        return False
+    return s[i:i + 2] in ("19", "20") and s[i + 2].isdecimal() and s[i + 3].isdecimal()
+
+
+def _scan_time(s: str, i: int) -> Optional[Tuple[int, int, int]]:
+    """Matches [T _.-]?HH[:._-]?MM([:._-]?SS)? at i, followed by a non-digit."""
+    for lead in _separator_options(s, i, _TIME_LEAD_SEPARATORS):
+        hi = i + lead
+        if not _is_hour_at(s, hi):
+            continue
+        for sep in _separator_options(s, hi + 2, _TIME_SEPARATORS):
+            mi = hi + 2 + sep
+            if not _is_minute_at(s, mi):
+                continue
+            end = mi + 2
+            for sec_sep in _separator_options(s, end, _TIME_SEPARATORS):
+                si = end + sec_sep
+                if _is_minute_at(s, si) and not _is_digit_at(s, si + 2):
+                    return int(s[hi:hi + 2]), int(s[mi:mi + 2]), int(s[si:si + 2])
+            if not _is_digit_at(s, end):
+                return int(s[hi:hi + 2]), int(s[mi:mi + 2]), 0
+    return None
+
+
+def _scan_full_date(s: str, i: int):
     """
-    Sets the creation time of a file on Windows using ctypes.
+    Matches the full shape after a year ending at i.
+    Returns (month, day, time, has_sep1, has_sep2) or None; time is (H, M, S) or None.
     """
-    # Convert timestamp to Windows file time (100-nanosecond intervals since Jan 1, 1601)
-    # Unix epoch is Jan 1, 1970. Difference is 11644473600 seconds.
-    creation_time = int((timestamp + 11644473600) * 10000000)
-    
+    for sep1 in _separator_options(s, i, _DATE_SEPARATORS):
+        mi = i + sep1
+        if not _is_month_at(s, mi):
+            continue
+        for sep2 in _separator_options(s, mi + 2, _DATE_SEPARATORS):
+            di = mi + 2 + sep2
+            if not _is_day_at(s, di):
+                continue
+            end = di + 2
+            time = _scan_time(s, end)
+            if time is not None or not _is_digit_at(s, end):
+                return int(s[mi:mi + 2]), int(s[di:di + 2]), time, bool(sep1), bool(sep2)
+    return None
+
+def _parse_exif_datetime(date_str: str) -> Optional[datetime.datetime]:
+    """
+    Parses an EXIF date string (YYYY:MM:DD HH:MM:SS).
+    The fixed 19-char layout is sliced directly; anything else goes through strptime.
+    """
+    try:
+        digits = date_str[0:4] + date_str[5:7] + date_str[8:10] + date_str[11:13] + date_str[14:16] + date_str[17:19]
+        # ASCII digits only: int() alone would also take padded (" 5") or non-ASCII digits strptime rejects.
+        if len(date_str) == 19 and date_str[4] == ":" and date_str[7] == ":" and date_str[10] == " " \
+                and date_str[13] == ":" and date_str[16] == ":" and digits.isascii() and digits.isdigit():
+            return datetime.datetime(
+                int(date_str[0:4]), int(date_str[5:7]), int(date_str[8:10]),
+                int(date_str[11:13]), int(date_str[14:16]), int(date_str[17:19]),
+            )
+        return datetime.datetime.strptime(date_str, "%Y:%m:%d %H:%M:%S")
+    except ValueError:
+        return None
+
+EXIF_TAG_DATETIME = 306
+EXIF_TAG_DATETIME_ORIGINAL = 36867
+_EXIF_DATE_TAGS = (EXIF_TAG_DATETIME_ORIGINAL, EXIF_TAG_DATETIME)
+_JPEG_SOI = b"\xff\xd8"
+_JPEG_APP1 = 0xE1
+_JPEG_SOS = 0xDA
+_JPEG_EOI = 0xD9
+_EXIF_HEADER = b"Exif\x00\x00"
+
+
+def _read_jpeg_exif_block(path: str) -> Optional[bytes]:
+    """
+    Returns the TIFF block of a JPEG's EXIF APP1 segment without decoding the image.
+    Returns None if the file is not a JPEG, b"" if it is a JPEG without EXIF.
+    """
+    with open(path, "rb") as f:
+        if f.read(2) != _JPEG_SOI:
+            return None
+        while True:
+            header = f.read(4)
+            if len(header) < 4 or header[0] != 0xFF:
+                return b""
+            marker = header[1]
+            if marker == 0xFF:
+                # Fill byte: realign on the next one.
+                f.seek(-3, os.SEEK_CUR)
+                continue
+            if marker in (_JPEG_SOS, _JPEG_EOI):
+                return b""
+            if marker == 0x01 or 0xD0 <= marker <= 0xD7:
+                # Standalone markers carry no length.
+                f.seek(-2, os.SEEK_CUR)
+                continue
+            length = struct.unpack(">H", header[2:4])[0] - 2
+            if length < 0:
+                return b""
+            if marker == _JPEG_APP1:
+                payload = f.read(length)
+                if payload.startswith(_EXIF_HEADER):
+                    return payload[len(_EXIF_HEADER):]
+            else:
+                f.seek(length, os.SEEK_CUR)
+
+
+def _replace_jpeg_exif_segment(path: str, exif_bytes: bytes) -> bool:
+    """
+    Rewrites only the EXIF APP1 segment of a JPEG; every other byte, including the
+    entropy-coded image data, is copied through untouched.
+    exif_bytes is the full APP1 payload (starting with Exif\\0\\0), e.g. Image.Exif.tobytes().
+    Returns False if the file is not a JPEG this can handle, leaving it unchanged.
+    """
+    if len(exif_bytes) + 2 > 0xFFFF:
+        return False
+    app1 = b"\xff" + bytes([_JPEG_APP1]) + struct.pack(">H", len(exif_bytes) + 2) + exif_bytes
+
+    tmp_path = path + ".exif-tmp"
+    with open(path, "rb") as src:
+        if src.read(2) != _JPEG_SOI:
+            return False
+        head = []
+        insert_at = 0
+        replaced = False
+        while True:
+            header = src.read(4)
+            if len(header) < 4 or header[0] != 0xFF:
+                return False
+            marker = header[1]
+            if marker == 0xFF:
+                # Fill byte: drop it and realign on the next one.
+                src.seek(-3, os.SEEK_CUR)
+                continue
+            if marker == 0x01 or 0xD0 <= marker <= 0xD7:
+                head.append(header[:2])
+                src.seek(-2, os.SEEK_CUR)
+                continue
+            if marker in (_JPEG_SOS, _JPEG_EOI):
+                src.seek(-4, os.SEEK_CUR)
+                break
+            length = struct.unpack(">H", header[2:4])[0] - 2
+            payload = src.read(length)
+            if length < 0 or len(payload) < length:
+                return False
+            if marker == _JPEG_APP1 and payload.startswith(_EXIF_HEADER):
+                if not replaced:
+                    head.append(app1)
+                    replaced = True
+                continue
+            head.append(header + payload)
+            if marker == 0xE0 and len(head) == insert_at + 1:
+                # Keep a leading JFIF APP0 first, as readers expect.
+                insert_at = len(head)
+        if not replaced:
+            head.insert(insert_at, app1)
+
+        try:
+            with open(tmp_path, "wb") as dst:
+                dst.write(_JPEG_SOI)
+                dst.writelines(head)
+                shutil.copyfileobj(src, dst)
+            shutil.copymode(path, tmp_path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    os.replace(tmp_path, path)
+    return True
+
+
+def _read_tiff_date_tags(tiff: bytes) -> Dict[int, str]:
+    """
+    Collects ASCII date tags from IFD0 of a TIFF block. Only IFD0, like Pillow's
+    img.getexif() used for every other format, so JPEGs resolve the same tags.
+    """
+    if tiff[:4] == b"II*\x00":
+        order = "<"
+    elif tiff[:4] == b"MM\x00*":
+        order = ">"
+    else:
+        return {}
+
+    found: Dict[int, str] = {}
+    offset = struct.unpack_from(order + "I", tiff, 4)[0]
+    if offset + 2 > len(tiff):
+        return found
+    count = struct.unpack_from(order + "H", tiff, offset)[0]
+    for i in range(count):
+        entry = offset + 2 + i * 12
+        if entry + 12 > len(tiff):
+            break
+        tag, typ, n, value = struct.unpack_from(order + "HHI4s", tiff, entry)
+        if tag in _EXIF_DATE_TAGS and typ == 2 and tag not in found:
+            # ASCII values longer than 4 bytes live at an offset into the block.
+            if n > 4:
+                start = struct.unpack(order + "I", value)[0]
+                raw = tiff[start:start + n]
+            else:
+                raw = value[:n]
+            text = raw.split(b"\x00", 1)[0].decode("latin-1").strip()
+            if text:
+                found[tag] = text
+    return found
+
+
+def _read_exif_date(path: str) -> Optional[datetime.datetime]:
+    """Extracts DateTimeOriginal from image EXIF."""
+    try:
+        # JPEG: read only the EXIF header segment; other formats go through Pillow.
+        tiff = _read_jpeg_exif_block(path)
+        if tiff is not None:
+            tags = _read_tiff_date_tags(tiff) if tiff else {}
+            date_str = tags.get(EXIF_TAG_DATETIME_ORIGINAL) or tags.get(EXIF_TAG_DATETIME)
+            return _parse_exif_datetime(date_str) if date_str else None
+
+        with Image.open(path) as img:
+            exif = img.getexif()
+            if not exif:
+                return None
+
+            # Try DateTimeOriginal (36867) then DateTime (306)
+            date_str = exif.get(36867) or exif.get(306)
+
+            if date_str:
+                return _parse_exif_datetime(date_str)
+    except Exception:
+        pass
+    return None
+
+
+@lru_cache(maxsize=4096)
+def _cached_exif_date(path: str, mtime_ns: int, size: int) -> Optional[datetime.datetime]:
+    # mtime/size are part of the key so edited files are re-read.
+    return _read_exif_date(path)
+
+def _split_ext(filename: str) -> Tuple[str, str]:
+    """os.path.splitext for a bare file name (no directory part), via one rfind."""
+    dot = filename.rfind(".")
+    # Like splitext, leading dots (".hidden") don't start an extension.
+    if dot > 0 and filename[:dot].lstrip("."):
+        return filename[:dot], filename[dot:]
+    return filename, ""
+
+def known_destination_names(directory: str) -> Optional[Set[str]]:
+    """
+    Lists directory once, for repeated unique_destination_path calls into it.
+    Returns None when it can't be listed (not a directory, no access), so callers fall
+    back to per-candidate existence probes and report the error per file as before.
+    """
+    try:
+        return {os.path.normcase(name) for name in os.listdir(directory)}
+    except OSError:
+        return None
+
+def unique_destination_path(directory: str, filename: str, known_names: Optional[Set[str]] = None) -> str:
+    """
+    Returns a free path for filename in directory, using the "name (2).ext" suffix on collisions.
+    known_names (from known_destination_names) replaces per-candidate os.path.exists probes;
+    the chosen name is added to it so later calls in the same batch see it as taken.
+    """
+    def taken(name: str) -> bool:
+        if known_names is None:
+            return os.path.exists(os.path.join(directory, name))
+        # normcase: on Windows names collide case-insensitively, as the filesystem does.
+        return os.path.normcase(name) in known_names
+
+    name = filename
+    if taken(name):
+        base, ext = _split_ext(filename)
+        i = 2
+        while True:
+            name = f"{base} ({i}){ext}"
+            if not taken(name):
+                break
+            i += 1
+    if known_names is not None:
+        known_names.add(os.path.normcase(name))
+    return os.path.join(directory, name)
+
+@lru_cache(maxsize=256)
+def _filetime(ticks: int) -> wintypes.FILETIME:
+    # Bulk applies often share one target date; SetFileTime only reads the struct, so reuse it.
+    return wintypes.FILETIME(ticks & 0xFFFFFFFF, ticks >> 32)
+
+_EPOCH_1601 = datetime.datetime(1601, 1, 1)
+_EPOCH_1970 = datetime.datetime(1970, 1, 1)
+
+@lru_cache(maxsize=1024)
+def _local_to_utc(dt: datetime.datetime) -> datetime.datetime:
+    # The only step needing the OS timezone rules (mktime); batches mostly repeat dates.
+    # Goes through timestamp() so DST gaps/folds resolve exactly as before.
+    return _EPOCH_1970 + datetime.timedelta(seconds=dt.timestamp())
+
+def datetime_to_filetime(dt: datetime.datetime) -> int:
+    """
+    Converts a datetime (naive = local time, like datetime.timestamp()) to Windows file time:
+    100-nanosecond intervals since Jan 1, 1601 UTC, using integer timedelta arithmetic.
+    """
+    if dt.tzinfo is None:
+        dt = _local_to_utc(dt)
+    else:
+        dt = dt.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    delta = dt - _EPOCH_1601
+    return delta.days * 864000000000 + delta.seconds * 10000000 + delta.microseconds * 10
+
+def set_file_creation_time_from_dt(path: str, dt: datetime.datetime) -> bool:
+    """
+    Sets the creation, access and modified times of a file on Windows using ctypes.
+    dt is converted with datetime_to_filetime; naive datetimes go through an LRU-cached timestamp().
+    """
+    creation_time = datetime_to_filetime(dt)
     handle = kernel32.CreateFileW(
         path, 
         FILE_WRITE_ATTRIBUTES, 
@@ -42,18 +406,17 @@ def set_file_creation_time(path: str, timestamp: float):
         None
     )
     
-    if handle == -1:
+    if handle is None or handle == INVALID_HANDLE_VALUE:
         return False
         
-    c_creation_time = wintypes.FILETIME(creation_time & 0xFFFFFFFF, creation_time >> 32)
+    c_creation_time = _filetime(creation_time)
     
-    # We only change creation time here. Access/Write can be handled by os.utime if needed
-    result = kernel32.SetFileTime(handle, ctypes.byref(c_creation_time), None, None)
+    # Creation, access and modified times all move to the target date in one call,
+    # as requested implicitly by "Change Date" usually (no second open via os.utime).
+    file_time = ctypes.byref(c_creation_time)
+    result = kernel32.SetFileTime(handle, file_time, file_time, file_time)
     kernel32.CloseHandle(handle)
     
-    # Also update Modified time to match, as requested implicitly by "Change Date" usually
-    os.utime(path, (timestamp, timestamp))
-    
     return result != 0
 
 class MetadataService:
@@ -61,27 +424,23 @@ class MetadataService:
         self.exif_date_tag = 36867 # DateTimeOriginal
         self.exif_writable_exts = {".jpg", ".jpeg", ".tif", ".tiff", ".webp", ".png"}
 
-    def can_write_exif(self, path: str) -> bool:
-        ext = os.path.splitext(path)[1].lower()
+    def can_write_exif(self, path: str, ext: Optional[str] = None) -> bool:
+        """ext: optional pre-lowercased extension (with dot) when the caller already has it."""
+        if ext is None:
+            ext = _split_ext(os.path.basename(path))[1].lower()
         return ext in self.exif_writable_exts
     
-    def get_exif_date(self, path: str) -> Optional[datetime.datetime]:
-        """Extracts DateTimeOriginal from image EXIF."""
-        try:
-            with Image.open(path) as img:
-                exif = img.getexif()
-                if not exif:
-                    return None
-                
-                # Try DateTimeOriginal (36867) then DateTime (306)
-                date_str = exif.get(36867) or exif.get(306)
-                
-                if date_str:
-                    # Format: YYYY:MM:DD HH:MM:SS
-                    return datetime.datetime.strptime(date_str, "%Y:%m:%d %H:%M:%S")
-        except Exception:
-            pass
-        return None
+    def get_exif_date(self, path: str, st: Optional[os.stat_result] = None) -> Optional[datetime.datetime]:
+        """
+        Extracts DateTimeOriginal from image EXIF (cached per path, mtime and size).
+        st: optional stat result when the caller already has one (e.g. DirEntry.stat()).
+        """
+        if st is None:
+            try:
+                st = os.stat(path)
+            except OSError:
+                return None
+        return _cached_exif_date(path, st.st_mtime_ns, st.st_size)
 
     def parse_filename_date_info(self, path: str) -> Tuple[Optional[datetime.datetime], str]:
         """
@@ -90,60 +449,66 @@ class MetadataService:
         """
         filename = os.path.basename(path)
 
-        # YYYYMMDD[HHMM[SS]] and separated variants like YYYY-MM-DD 20.35.25
-        full_pattern = re.compile(
-            r"(?<!\d)"
-            r"((?:19|20)\d{2})"
-            r"[-_. ]?"
-            r"(0[1-9]|1[0-2])"
-            r"[-_. ]?"
-            r"(0[1-9]|[12]\d|3[01])"
-            r"(?:[T _.-]?"
-            r"([01]\d|2[0-3])"
-            r"[:._-]?"
-            r"([0-5]\d)"
-            r"(?:[:._-]?([0-5]\d))?"
-            r")?"
-            r"(?!\d)"
-        )
-        match = full_pattern.search(filename)
-        if match:
-            try:
-                y, m, d = map(int, match.group(1, 2, 3))
-                if match.group(4) and match.group(5):
-                    H = int(match.group(4))
-                    M = int(match.group(5))
-                    S = int(match.group(6) or "0")
-                    return datetime.datetime(y, m, d, H, M, S), "datetime"
-                return datetime.datetime(y, m, d, 12, 0, 0), "date"
-            except ValueError:
-                pass
-
-        # YYYY-MM (no day)
-        ym_pattern = re.compile(
-            r"(?<!\d)"
-            r"((?:19|20)\d{2})"
-            r"[-_. ]"
-            r"(0[1-9]|1[0-2])"
-            r"(?!\d)"
-        )
-        match = ym_pattern.search(filename)
-        if match:
-            try:
-                y, m = map(int, match.group(1, 2))
-                return datetime.datetime(y, m, 1, 12, 0, 0), "year-month"
-            except ValueError:
-                pass
+        # Fast reject: every shape starts with a 19xx/20xx year, so names like
+        # IMG_random.jpg or screenshot.png stop after two C-level substring searches.
+        next_19 = filename.find("19")
+        next_20 = filename.find("20")
+        if next_19 < 0 and next_20 < 0:
+            return None, "none"
 
-        # YYYY only
-        year_pattern = re.compile(r"(?<!\d)((?:19|20)\d{2})(?!\d)")
-        match = year_pattern.search(filename)
-        if match:
-            try:
-                y = int(match.group(1))
-                return datetime.datetime(y, 1, 1, 12, 0, 0), "year"
-            except ValueError:
-                pass
+        # Precedence is global: the first full date wins, else the first year-month,
+        # else the first year. An invalid first full date (e.g. Feb 30) is skipped,
+        # but the year-month/year shapes that overlap it still count.
+        seen_full = False
+        ym_date = None
+        year_date = None
+        length = len(filename)
+        while next_19 >= 0 or next_20 >= 0:
+            if next_20 < 0 or 0 <= next_19 < next_20:
+                i = next_19
+                next_19 = filename.find("19", i + 1)
+            else:
+                i = next_20
+                next_20 = filename.find("20", i + 1)
+            if not _is_year_at(filename, i):
+                continue
+
+            y = int(filename[i:i + 4])
+            after_year = i + 4
+            full = _scan_full_date(filename, after_year)
+            if full is not None:
+                m, d, time, has_sep1, has_sep2 = full
+                if not seen_full:
+                    seen_full = True
+                    try:
+                        if time is not None:
+                            H, M, S = time
+                            return datetime.datetime(y, m, d, H, M, S), "datetime"
+                        return datetime.datetime(y, m, d, 12, 0, 0), "date"
+                    except ValueError:
+                        pass
+                if has_sep1:
+                    if ym_date is None and has_sep2:
+                        ym_date = datetime.datetime(y, m, 1, 12, 0, 0)
+                    if year_date is None:
+                        year_date = datetime.datetime(y, 1, 1, 12, 0, 0)
+            elif ym_date is None or year_date is None:
+                after_sep = after_year + 1
+                if (
+                    after_year < length
+                    and filename[after_year] in _DATE_SEPARATORS
+                    and _is_month_at(filename, after_sep)
+                    and not _is_digit_at(filename, after_sep + 2)
+                ):
+                    if ym_date is None:
+                        ym_date = datetime.datetime(y, int(filename[after_sep:after_sep + 2]), 1, 12, 0, 0)
+                if year_date is None and not _is_digit_at(filename, after_year):
+                    year_date = datetime.datetime(y, 1, 1, 12, 0, 0)
+
+        if ym_date is not None:
+            return ym_date, "year-month"
+        if year_date is not None:
+            return year_date, "year"
 
         return None, "none"
 
@@ -151,7 +516,7 @@ class MetadataService:
         parsed, _ = self.parse_filename_date_info(path)
         return parsed
 
-    def resolve_exif_mode_date(self, path: str) -> Tuple[Optional[datetime.datetime], str, str]:
+    def resolve_exif_mode_date(self, path: str) -> Tuple[Optional[datetime.datetime], str, str, bool]:
         """
         Priority rule:
         1) EXIF is primary.
@@ -159,24 +524,26 @@ class MetadataService:
         3) If EXIF year is later than filename year, use filename date.
         4) If EXIF exists and is not later, keep EXIF.
         5) If EXIF missing, use filename date.
+        Also returns whether the file carries an EXIF date, so callers don't re-read it.
         """
         exif_date = self.get_exif_date(path)
         filename_date, filename_precision = self.parse_filename_date_info(path)
+        exif_present = exif_date is not None
 
         if exif_date and filename_date:
             if exif_date.year == filename_date.year:
-                return exif_date, "exif", "year-match"
+                return exif_date, "exif", "year-match", exif_present
             if exif_date.year > filename_date.year:
-                return filename_date, "filename", "filename-overrides-future-exif"
-            return exif_date, "exif", "exif-priority-mismatch"
+                return filename_date, "filename", "filename-overrides-future-exif", exif_present
+            return exif_date, "exif", "exif-priority-mismatch", exif_present
 
         if exif_date:
-            return exif_date, "exif", "exif-only"
+            return exif_date, "exif", "exif-only", exif_present
 
         if filename_date:
-            return filename_date, "filename", f"filename-only-{filename_precision}"
+            return filename_date, "filename", f"filename-only-{filename_precision}", exif_present
 
-        return None, "none", "unresolved"
+        return None, "none", "unresolved", exif_present
 
     def write_exif_date(self, path: str, dt: datetime.datetime, overwrite: bool = False) -> Tuple[bool, str]:
         """
@@ -199,28 +566,39 @@ class MetadataService:
                 if fmt not in {"JPEG", "JPG", "TIFF", "WEBP", "PNG"}:
                     return False, f"EXIF write not supported for format: {fmt or 'UNKNOWN'}"
 
-                img.save(path, exif=exif.tobytes())
-                return True, date_str
+                exif_bytes = exif.tobytes()
+                if fmt not in {"JPEG", "JPG"}:
+                    img.save(path, exif=exif_bytes)
+                    return True, date_str
+
+            # JPEG: swap the APP1 segment in place instead of decoding and re-encoding pixels.
+            # Runs after the image is closed so the file can be replaced (Windows locks open files).
+            if not _replace_jpeg_exif_segment(path, exif_bytes):
+                with Image.open(path) as img:
+                    img.save(path, exif=exif_bytes)
+            return True, date_str
         except Exception as e:
             return False, f"EXIF write failed: {str(e)}"
 
-    def apply_date_to_file(self, path: str, mode: str, manual_date: str = None, destination_path: str = None) -> Tuple[bool, str]:
+    def apply_date_to_file(self, path: str, mode: str, manual_date: str = None, destination_path: str = None,
+                           known_names: Optional[Set[str]] = None) -> Tuple[bool, str]:
         """
         Applies date to file based on mode.
         If destination_path is provided, copies file there first, then modifies the COPY.
+        known_names: optional known_destination_names(destination_path), shared across a batch.
         Returns: (Success, Message)
         """
-        import shutil
-        
         target_file_path = path
+        fname = os.path.basename(path)
+        # Copies keep the source extension, so one lookup serves both source and target.
+        ext = _split_ext(fname)[1].lower()
         
         # 1. Handle Copy if Destination Provided
         if destination_path:
             if not os.path.isdir(destination_path):
                 return False, "Destination is not a directory"
             
-            fname = os.path.basename(path)
-            target_file_path = unique_destination_path(destination_path, fname)
+            target_file_path = unique_destination_path(destination_path, fname, known_names)
             
             try:
                 shutil.copy2(path, target_file_path)
@@ -239,13 +617,13 @@ class MetadataService:
                 return False, "Invalid manual date"
                 
         elif mode == 'exif':
-            resolved_date, resolved_source, resolved_rule = self.resolve_exif_mode_date(path)
+            resolved_date, resolved_source, resolved_rule, exif_present = self.resolve_exif_mode_date(path)
             if not resolved_date:
                 return False, "No EXIF and no usable date in filename"
 
             # If filename should override (future EXIF mismatch) or EXIF missing, write/update EXIF on target.
             # Video files cannot carry image EXIF via Pillow; for those, we only apply filesystem timestamp.
-            exif_writable = self.can_write_exif(target_file_path)
+            exif_writable = self.can_write_exif(target_file_path, ext)
             if resolved_source == "filename":
                 if exif_writable:
                     ok, msg = self.write_exif_date(target_file_path, resolved_date, overwrite=True)
@@ -253,14 +631,14 @@ class MetadataService:
                         return False, msg
             else:
                 # Keep existing EXIF as primary, but ensure target has EXIF after copy.
-                if exif_writable and not self.get_exif_date(target_file_path):
+                # The copy carries the source's EXIF, so the presence flag from resolve applies to it.
+                if exif_writable and not exif_present:
                     ok, msg = self.write_exif_date(target_file_path, resolved_date, overwrite=False)
                     if not ok:
                         return False, msg
 
             # Align filesystem time to resolved date (always).
-            timestamp = resolved_date.timestamp()
-            success = set_file_creation_time(target_file_path, timestamp)
+            success = set_file_creation_time_from_dt(target_file_path, resolved_date)
             if not success:
                 return False, "Failed to set system time"
 
@@ -274,8 +652,7 @@ class MetadataService:
         
         # 3. Apply to Target
         if target_date:
-            timestamp = target_date.timestamp()
-            success = set_file_creation_time(target_file_path, timestamp)
+            success = set_file_creation_time_from_dt(target_file_path, target_date)
             if success:
                 return True, target_date.isoformat()
             else:
@@ -1,30 +1,183 @@
 import os
+import mmap
+from array import array
 import xxhash
-import asyncio
-from typing import List, Dict, Tuple
+from typing import List, Dict, Iterator, Optional, Tuple
 from concurrent.futures import ThreadPoolExecutor
 
+STORAGE_HDD = "hdd"
+STORAGE_SSD = "ssd"
+STORAGE_NETWORK = "network"
+STORAGE_UNKNOWN = "unknown"
+
+
+def _detect_storage_type_windows(path: str) -> str:
+    import ctypes
+    from ctypes import wintypes
+
+    drive, _ = os.path.splitdrive(path)
+    if not drive or drive.startswith("\\\\"):
+        return STORAGE_NETWORK if drive else STORAGE_UNKNOWN
+
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    DRIVE_REMOTE = 4
+    if kernel32.GetDriveTypeW(drive + "\\") == DRIVE_REMOTE:
+        return STORAGE_NETWORK
+
+    class STORAGE_PROPERTY_QUERY(ctypes.Structure):
+        _fields_ = [("PropertyId", wintypes.DWORD), ("QueryType", wintypes.DWORD),
+                    ("AdditionalParameters", wintypes.BYTE * 1)]
+
+    class DEVICE_SEEK_PENALTY_DESCRIPTOR(ctypes.Structure):
+        _fields_ = [("Version", wintypes.DWORD), ("Size", wintypes.DWORD),
+                    ("IncursSeekPenalty", wintypes.BOOLEAN)]
+
+    IOCTL_STORAGE_QUERY_PROPERTY = 0x002D1400
+    STORAGE_DEVICE_SEEK_PENALTY_PROPERTY = 7
+    FILE_SHARE_READ_WRITE = 0x00000003
+    OPEN_EXISTING = 3
+    INVALID_HANDLE_VALUE = wintypes.HANDLE(-1).value
+
+    kernel32.CreateFileW.restype = wintypes.HANDLE
+    handle = kernel32.CreateFileW(f"\\\\.\\{drive}", 0, FILE_SHARE_READ_WRITE, None, OPEN_EXISTING, 0, None)
+    if handle in (None, INVALID_HANDLE_VALUE):
+        return STORAGE_UNKNOWN
+    try:
+        query = STORAGE_PROPERTY_QUERY(STORAGE_DEVICE_SEEK_PENALTY_PROPERTY, 0)
+        result = DEVICE_SEEK_PENALTY_DESCRIPTOR()
+        returned = wintypes.DWORD()
+        ok = kernel32.DeviceIoControl(
+            wintypes.HANDLE(handle), IOCTL_STORAGE_QUERY_PROPERTY,
+            ctypes.byref(query), ctypes.sizeof(query),
+            ctypes.byref(result), ctypes.sizeof(result),
+            ctypes.byref(returned), None,
+        )
+        if not ok:
+            return STORAGE_UNKNOWN
+        return STORAGE_HDD if result.IncursSeekPenalty else STORAGE_SSD
+    finally:
+        kernel32.CloseHandle(wintypes.HANDLE(handle))
+
+
+def _detect_storage_type(path: str) -> str:
+    """Best-effort guess of the storage behind path: hdd, ssd, network or unknown."""
+    if os.name != "nt":
+        return STORAGE_UNKNOWN
+    try:
+        return _detect_storage_type_windows(os.path.abspath(path))
+    except Exception:
+        return STORAGE_UNKNOWN
+
+
+def _workers_for_storage(storage_type: str) -> int:
+    cpu_count = os.cpu_count() or 1
+    if storage_type == STORAGE_HDD:
+        # Concurrent reads on a spinning disk thrash the head; stay near sequential.
+        return min(cpu_count, 2)
+    if storage_type == STORAGE_NETWORK:
+        return min(cpu_count, 8)
+    return cpu_count
+
+
+def _walk(root_path: str) -> Iterator[Tuple[str, int]]:
+    """
+    Yields (path, size) for every file under root_path, in os.walk order.
+    Sizes come from DirEntry.stat(), which reuses the directory listing where the OS allows.
+    """
+    try:
+        with os.scandir(root_path) as it:
+            entries = list(it)
+    except OSError:
+        return
+
+    subdirs = []
+    for entry in entries:
+        try:
+            if entry.is_dir():
+                # Like os.walk(followlinks=False): list symlinked dirs but don't descend.
+                if not entry.is_symlink():
+                    subdirs.append(entry.path)
+                continue
+            yield entry.path, entry.stat().st_size
+        except OSError:
+            continue
+
+    for subdir in subdirs:
+        yield from _walk(subdir)
+
+
 class FileScanner:
-    def __init__(self, chunk_size: int = 1024 * 1024):
+    def __init__(self, chunk_size: int = 1024 * 1024, head_size: int = 64 * 1024,
+                 small_file_size: int = 256 * 1024):
         self.chunk_size = chunk_size
-        self.executor = ThreadPoolExecutor(max_workers=os.cpu_count())
+        self.head_size = head_size
+        self.small_file_size = small_file_size
+        # Pool size depends on the storage being scanned, so it is created on first scan.
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.storage_type = STORAGE_UNKNOWN
+
+    def _ensure_executor(self, root_path: str) -> ThreadPoolExecutor:
+        if self.executor is None:
+            self.storage_type = _detect_storage_type(root_path)
+            self.executor = ThreadPoolExecutor(max_workers=_workers_for_storage(self.storage_type))
+        return self.executor
 
-    def get_file_hash(self, file_path: str) -> str:
-        """Calculates xxHash64 of a file continuously."""
+    def get_head_hash(self, file_path: str) -> Optional[int]:
+        """Calculates XXH3-64 (as an int) of the first head_size bytes of a file."""
+        try:
+            with open(file_path, 'rb') as f:
+                return xxhash.xxh3_64_intdigest(f.read(self.head_size))
+        except OSError:
+            return None
+
+    def get_file_hash(self, file_path: str) -> Optional[int]:
+        """
+        Calculates XXH3-64 (as an int) of a file.
+        On local disks the file is hashed as one memory map; elsewhere it is read in chunks,
+        since a read error on a mapped page (dropped share, file truncated mid-hash)
+        crashes the process instead of raising OSError.
+        """
         try:
-            hasher = xxhash.xxh64()
+            hasher = xxhash.xxh3_64()
             with open(file_path, 'rb') as f:
+                if self.storage_type in (STORAGE_HDD, STORAGE_SSD):
+                    try:
+                        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                            hasher.update(mm)
+                        return hasher.intdigest()
+                    except (ValueError, OSError):
+                        # Empty or unmappable (special) files: fall back to chunked reads.
+                        hasher.reset()
+                        f.seek(0)
                 while chunk := f.read(self.chunk_size):
                     hasher.update(chunk)
-            return hasher.hexdigest()
+            return hasher.intdigest()
         except OSError:
             return None
 
-    async def scan_directory(self, root_path: str) -> Dict[str, List[Dict]]:
+    def hash_small_files(self, paths: List[str]) -> List[Optional[int]]:
         """
-        Scans directory in two passes:
+        Hashes small files inline with one reused hasher.
+        For these, thread-pool dispatch costs more than the read and digest themselves.
+        """
+        hasher = xxhash.xxh3_64()
+        hashes = []
+        for path in paths:
+            try:
+                with open(path, 'rb') as f:
+                    hasher.reset()
+                    hasher.update(f.read())
+                hashes.append(hasher.intdigest())
+            except OSError:
+                hashes.append(None)
+        return hashes
+
+    def scan_directory(self, root_path: str) -> Dict[str, List[Dict]]:
+        """
+        Scans directory in passes:
         1. Group by Size (Fast)
-        2. Group by Hash (Compute Heavy, only for same-size files)
+        2. Group by Head Hash (first head_size bytes, only for same-size files)
+        3. Group by Hash (Compute Heavy, only for files whose heads also collide)
         """
         size_map: Dict[int, List[str]] = {}
         
@@ -32,45 +185,65 @@ class FileScanner:
         if not os.path.exists(root_path):
             raise ValueError("Directory does not exist")
 
-        for dirpath, _, filenames in os.walk(root_path):
-            for f in filenames:
-                full_path = os.path.join(dirpath, f)
-                try:
-                    stats = os.stat(full_path)
-                    size = stats.st_size
-                    if size > 0: # Ignore empty files
-                        if size not in size_map:
-                            size_map[size] = []
-                        size_map[size].append(full_path)
-                except (OSError, PermissionError):
-                    continue
+        for full_path, size in _walk(root_path):
+            if size > 0: # Ignore empty files
+                if size not in size_map:
+                    size_map[size] = []
+                size_map[size].append(full_path)
+
+        self._ensure_executor(root_path)
 
         # Filter out unique sizes (cannot be duplicates)
         potential_duplicates = {s: p for s, p in size_map.items() if len(p) > 1}
         
-        # Pass 2: Calculate hashes for potential duplicates
-        duplicates_by_hash: Dict[str, List[Dict]] = {}
-        
-        loop = asyncio.get_event_loop()
+        # Pass 2: Calculate hashes for potential duplicates.
+        # Hashed files are kept as parallel columns plus a hash -> row index;
+        # per-file dicts are only built for the groups that are returned.
+        # Hashes stay 64-bit ints (cheaper to key and store than hex strings)
+        # until the result is materialized.
+        hashed_paths: List[str] = []
+        hashed_sizes = array('q')
+        rows_by_hash: Dict[int, List[int]] = {}
         
         for size, paths in potential_duplicates.items():
-            # Run hashing in thread pool to not block event loop
-            tasks = [
-                loop.run_in_executor(self.executor, self.get_file_hash, path)
-                for path in paths
-            ]
-            hashes = await asyncio.gather(*tasks)
+            # Hash in the thread pool; xxhash releases the GIL while digesting
+            head_hashes = list(self.executor.map(self.get_head_hash, paths))
+
+            head_map: Dict[int, List[str]] = {}
+            for path, head_hash in zip(paths, head_hashes):
+                if head_hash is not None:
+                    head_map.setdefault(head_hash, []).append(path)
+            paths = [p for group in head_map.values() if len(group) > 1 for p in group]
+            if not paths:
+                continue
+
+            if size <= self.head_size:
+                # The head already covers the whole file, so its hash is the full hash.
+                hashes = [h for h, group in head_map.items() if len(group) > 1 for _ in group]
+            elif size <= self.small_file_size:
+                hashes = self.hash_small_files(paths)
+            else:
+                hashes = list(self.executor.map(self.get_file_hash, paths))
             
             for path, file_hash in zip(paths, hashes):
-                if file_hash:
-                    if file_hash not in duplicates_by_hash:
-                        duplicates_by_hash[file_hash] = []
-                    duplicates_by_hash[file_hash].append({
-                        "path": path,
-                        "size": size,
-                        "hash": file_hash,
-                        "name": os.path.basename(path)
-                    })
+                if file_hash is not None:
+                    rows_by_hash.setdefault(file_hash, []).append(len(hashed_paths))
+                    hashed_paths.append(path)
+                    hashed_sizes.append(size)
 
         # Final Filter: Only keep hash groups with >1 file
-        return {h: files for h, files in duplicates_by_hash.items() if len(files) > 1}
+        results: Dict[str, List[Dict]] = {}
+        for h, rows in rows_by_hash.items():
+            if len(rows) < 2:
+                continue
+            hex_hash = f"{h:016x}" # same text as hexdigest()
+            results[hex_hash] = [
+                {
+                    "path": hashed_paths[i],
+                    "size": hashed_sizes[i],
+                    "hash": hex_hash,
+                    "name": os.path.basename(hashed_paths[i])
+                }
+                for i in rows
+            ]
+        return results
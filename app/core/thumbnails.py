@@ -0,0 +1,240 @@
+import os
+import time
+import asyncio
+import subprocess
+import uuid
+from typing import List
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+try:
+    import pillow_heif
+    pillow_heif.register_heif_opener()
+except Exception:
+    pillow_heif = None
+try:
+    # Optional: libvips decodes + resizes thumbnails in a streaming, SIMD pass.
+    import pyvips
+except Exception:
+    pyvips = None
+
+# Thumbnail generation, kept free of app/DB setup: warm-up pool workers import only this
+# module (Windows spawns a fresh interpreter per worker).
+
+THUMB_FAIL_SUFFIX = ".fail"
+THUMB_FAIL_TTL_SECONDS = 6 * 60 * 60
+FFMPEG_TIMEOUT_SECONDS = 12
+
+
+def _create_image_thumbnail_vips(src_path: str, dst_path: str, size: int, quality: int = 62) -> bool:
+    try:
+        # thumbnail() applies EXIF orientation and shrinks on load, so the full image is never in memory.
+        thumb = pyvips.Image.thumbnail(src_path, size, height=size, size="down")
+        if thumb.hasalpha():
+            thumb = thumb.flatten()
+        thumb.write_to_file(dst_path, Q=quality, strip=True, optimize_coding=False)
+        return True
+    except pyvips.Error:
+        return False
+
+
+def create_image_thumbnail(src_path: str, dst_path: str, size: int, quality: int = 62) -> bool:
+    if pyvips is not None and _create_image_thumbnail_vips(src_path, dst_path, size, quality=quality):
+        return True
+    try:
+        with Image.open(src_path) as img:
+            # JPEG: let libjpeg decode at 1/2..1/8 scale (DCT scaling), keeping 2x headroom for
+            # resampling. Must precede exif_transpose, which fully decodes the image.
+            img.draft("RGB", (size * 2, size * 2))
+            img = ImageOps.exif_transpose(img)
+            if img.mode not in ("RGB", "L"):
+                img = img.convert("RGB")
+            elif img.mode == "L":
+                img = img.convert("RGB")
+            img.thumbnail((size, size), Image.Resampling.BILINEAR)
+            img.save(dst_path, format="JPEG", quality=quality, optimize=False)
+        return True
+    except (UnidentifiedImageError, OSError, ValueError):
+        return False
+
+
+def _video_thumbnail_cmd(src_path: str, dst_path: str, size: int, quality: int = 4) -> List[str]:
+    return [
+        "ffmpeg",
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-noaccurate_seek", # a nearby keyframe is fine for a thumbnail; skips decoding up to 1s
+        "-ss",
+        "00:00:01",
+        "-i",
+        src_path,
+        "-an",
+        "-sn",
+        "-dn",
+        "-frames:v",
+        "1",
+        "-vf",
+        f"scale={size}:-1:force_original_aspect_ratio=decrease",
+        "-q:v",
+        str(quality),
+        "-y",
+        dst_path,
+    ]
+
+
+def _ffmpeg_image_thumbnail_cmd(src_path: str, dst_path: str, size: int) -> List[str]:
+    # Fallback for formats Pillow may not decode (HEIC/RAW variants).
+    return [
+        "ffmpeg",
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-i",
+        src_path,
+        "-an",
+        "-sn",
+        "-dn",
+        "-frames:v",
+        "1",
+        "-vf",
+        f"scale={size}:-1:force_original_aspect_ratio=decrease",
+        "-q:v",
+        "4",
+        "-y",
+        dst_path,
+    ]
+
+
+def _run_ffmpeg(ffmpeg_cmd: List[str], dst_path: str) -> bool:
+    try:
+        result = subprocess.run(ffmpeg_cmd, capture_output=True, timeout=FFMPEG_TIMEOUT_SECONDS, check=False)
+        return result.returncode == 0 and os.path.isfile(dst_path)
+    except (OSError, subprocess.SubprocessError):
+        return False
+
+
+async def _run_ffmpeg_async(ffmpeg_cmd: List[str], dst_path: str) -> bool:
+    """Like _run_ffmpeg, but waits on the event loop instead of parking a worker thread."""
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *ffmpeg_cmd, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE
+        )
+    except NotImplementedError:
+        # Selector event loops (uvicorn --reload on Windows) cannot spawn subprocesses.
+        return await asyncio.to_thread(_run_ffmpeg, ffmpeg_cmd, dst_path)
+    except OSError:
+        return False
+    try:
+        await asyncio.wait_for(proc.communicate(), timeout=FFMPEG_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        await _kill_process(proc)
+        return False
+    except asyncio.CancelledError:
+        # Client went away: don't leave ffmpeg running (and writing) behind us.
+        await _kill_process(proc)
+        raise
+    return proc.returncode == 0 and os.path.isfile(dst_path)
+
+
+async def _kill_process(proc: asyncio.subprocess.Process) -> None:
+    try:
+        proc.kill()
+    except ProcessLookupError:
+        pass  # already exited
+    await proc.wait()
+
+
+def _create_video_thumbnail(src_path: str, dst_path: str, size: int, quality: int = 4) -> bool:
+    return _run_ffmpeg(_video_thumbnail_cmd(src_path, dst_path, size, quality=quality), dst_path)
+
+
+def thumbnail_failed_recently(cache_path: str) -> bool:
+    """Negative cache: a fresh sentinel next to cache_path means generation already failed."""
+    try:
+        failed_at = os.stat(cache_path + THUMB_FAIL_SUFFIX).st_mtime
+    except OSError:
+        return False
+    return time.time() - failed_at < THUMB_FAIL_TTL_SECONDS
+
+
+def mark_thumbnail_failed(dst_path: str) -> None:
+    # Same key as the positive cache, so an edited source (new mtime/size) is retried.
+    try:
+        with open(dst_path + THUMB_FAIL_SUFFIX, "w"):
+            pass
+    except OSError:
+        pass
+
+
+def _temp_thumbnail_path(cache_path: str) -> str:
+    # Unique per writer; keeps the .jpg extension ffmpeg/libvips pick the output format from.
+    return f"{cache_path}.{uuid.uuid4().hex}.tmp.jpg"
+
+
+def _discard_temp(tmp_path: str) -> None:
+    try:
+        os.remove(tmp_path)
+    except OSError:
+        pass
+
+
+def _publish_thumbnail(tmp_path: str, cache_path: str, ok: bool) -> bool:
+    # Readers only ever see complete files: the temp file is renamed into place.
+    if ok:
+        try:
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            ok = False
+    if not ok:
+        mark_thumbnail_failed(cache_path)
+    return ok
+
+
+async def _create_image_thumbnail_async(src_path: str, tmp_path: str, size: int, quality: int) -> bool:
+    future = asyncio.ensure_future(asyncio.to_thread(create_image_thumbnail, src_path, tmp_path, size, quality))
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        # The decode thread can't be interrupted; clean up whatever it writes once it finishes.
+        future.add_done_callback(lambda _: _discard_temp(tmp_path))
+        raise
+
+
+async def create_media_thumbnail_async(
+    src_path: str, cache_path: str, size: int, is_video: bool, quality: int = 62
+) -> bool:
+    """Route-side thumbnail: decoding runs in a thread, ffmpeg as an async subprocess. Failures are negative-cached."""
+    tmp_path = _temp_thumbnail_path(cache_path)
+    try:
+        if is_video:
+            ok = await _run_ffmpeg_async(_video_thumbnail_cmd(src_path, tmp_path, size, quality=4), tmp_path)
+        else:
+            ok = await _create_image_thumbnail_async(src_path, tmp_path, size, quality)
+            if not ok:
+                ok = await _run_ffmpeg_async(_ffmpeg_image_thumbnail_cmd(src_path, tmp_path, size), tmp_path)
+        return _publish_thumbnail(tmp_path, cache_path, ok)
+    finally:
+        _discard_temp(tmp_path)
+
+
+def generate_media_thumbnail(src_path: str, dst_path: str, size: int, is_video: bool, quality: int = 62) -> bool:
+    if is_video:
+        return _create_video_thumbnail(src_path, dst_path, size, quality=4)
+
+    if create_image_thumbnail(src_path, dst_path, size, quality=quality):
+        return True
+
+    return _run_ffmpeg(_ffmpeg_image_thumbnail_cmd(src_path, dst_path, size), dst_path)
+
+
+def warm_thumbnail(src_path: str, cache_path: str, size: int, is_video: bool) -> bool:
+    """Warm-up pool entry point; writes cache_path the same way the routes do."""
+    tmp_path = _temp_thumbnail_path(cache_path)
+    try:
+        try:
+            ok = generate_media_thumbnail(src_path, tmp_path, size, is_video, quality=62)
+        except OSError:
+            ok = False
+        return _publish_thumbnail(tmp_path, cache_path, ok)
+    finally:
+        _discard_temp(tmp_path)
@@ -1,29 +1,33 @@
-from fastapi import FastAPI, Depends, HTTPException, Request
+from fastapi import FastAPI, Depends, HTTPException, Request, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
-from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session, selectinload
+from typing import Dict, List, Optional, Tuple
 import os
+import stat
 import datetime
 import shutil
 import mimetypes
 import hashlib
-import subprocess
+import json
+import logging
 import re
-
-from PIL import Image, ImageOps, UnidentifiedImageError
-try:
-    import pillow_heif
-    pillow_heif.register_heif_opener()
-except Exception:
-    pillow_heif = None
+import asyncio
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 from app.core.scanner import FileScanner
-from app.core.metadata import MetadataService
+from app.core.thumbnails import create_media_thumbnail_async, thumbnail_failed_recently, warm_thumbnail
+from app.core.metadata import MetadataService, known_destination_names, unique_destination_path
 from app.db.models import init_db, SessionLocal, DuplicateGroup, FileEntry
 from pydantic import BaseModel
 
+logger = logging.getLogger(__name__)
+
 app = FastAPI(title="Local File Organizer")
 
 # Initialize DB
@@ -41,52 +45,82 @@ async def localhost_only(request: Request, call_next):
         return JSONResponse(status_code=403, content={"detail": "Access restricted to localhost"})
     return await call_next(request)
 
-IMAGE_EXTENSIONS = {
+IMAGE_EXTENSIONS = frozenset({
     ".jpg", ".jpeg", ".png", ".webp", ".bmp", ".gif", ".tif", ".tiff",
     ".heic", ".heif", ".avif", ".jxl",
     ".dng", ".arw", ".cr2", ".cr3", ".nef", ".nrw", ".raf", ".rw2", ".orf", ".srw", ".pef",
     ".3fr", ".iiq", ".erf", ".kdc", ".mrw", ".raw",
-}
-VIDEO_EXTENSIONS = {".mp4", ".mov", ".m4v", ".avi", ".mkv", ".webm", ".3gp"}
+})
+VIDEO_EXTENSIONS = frozenset({".mp4", ".mov", ".m4v", ".avi", ".mkv", ".webm", ".3gp"})
 MEDIA_EXTENSIONS = IMAGE_EXTENSIONS | VIDEO_EXTENSIONS
+# str.endswith tuples: one C-level tail compare, no splitext allocations
+MEDIA_SUFFIXES = tuple(sorted(MEDIA_EXTENSIONS, key=len, reverse=True))
+VIDEO_SUFFIXES = tuple(sorted(VIDEO_EXTENSIONS, key=len, reverse=True))
 THUMB_CACHE_DIR = os.path.join("memory-bank", "thumb-cache")
 THUMB_CACHE_VERSION = "v2-heif-orientation"
+THUMB_MEMORY_MAX_BYTES = 128 * 1024
+THUMB_MEMORY_BUDGET_BYTES = 64 * 1024 * 1024
 os.makedirs(THUMB_CACHE_DIR, exist_ok=True)
 ALLOWED_SOURCE_ROOTS: set[str] = set()
+_ROOTS_WITH_SEP: tuple[str, ...] = ()
+_thumb_memory: "OrderedDict[str, bytes]" = OrderedDict()
+_thumb_memory_bytes = 0
 
 
 def _file_ext(path: str) -> str:
     return os.path.splitext(path)[1].lower()
 
 
+@lru_cache(maxsize=8192)
 def _normalize_abs(path: str) -> str:
+    # Thumbnail grids re-validate the same paths on every request.
     return os.path.abspath(path)
 
 
+def _refresh_root_prefixes() -> None:
+    global _ROOTS_WITH_SEP
+    _ROOTS_WITH_SEP = tuple(
+        root if root.endswith(os.sep) else root + os.sep # drive/filesystem roots already end in sep
+        for root in ALLOWED_SOURCE_ROOTS
+    )
+
+
+def _clear_allowed_roots() -> None:
+    ALLOWED_SOURCE_ROOTS.clear()
+    _refresh_root_prefixes()
+
+
 def _register_allowed_root(path: str) -> None:
     abs_path = _normalize_abs(path)
     if os.path.isdir(abs_path):
         ALLOWED_SOURCE_ROOTS.add(abs_path)
+        _refresh_root_prefixes()
 
 
-def _is_under_root(path: str, root: str) -> bool:
-    try:
-        common = os.path.commonpath([_normalize_abs(path), _normalize_abs(root)])
-        return common == _normalize_abs(root)
-    except ValueError:
-        return False
+def _is_allowed_source_path(path: str) -> bool:
+    # Prefix compare against "root + sep" instead of os.path.commonpath: no per-call path splitting
+    abs_path = _normalize_abs(path)
+    return abs_path in ALLOWED_SOURCE_ROOTS or abs_path.startswith(_ROOTS_WITH_SEP)
 
 
-def _is_allowed_source_path(path: str) -> bool:
-    return any(_is_under_root(path, root) for root in ALLOWED_SOURCE_ROOTS)
+def _has_extension(path: str, suffixes: Tuple[str, ...], extensions: frozenset) -> bool:
+    path_l = path.lower()
+    if not path_l.endswith(suffixes):
+        return False
+    # Extensions are single-dot, so the last dot starts the matched suffix. A separator or
+    # dot before it (".jpg", "x/..jpg") is where splitext may see no extension: ask it.
+    dot = path_l.rfind(".")
+    if dot > 0 and path_l[dot - 1] not in "/\\.":
+        return True
+    return _file_ext(path) in extensions
 
 
 def _is_media(path: str) -> bool:
-    return _file_ext(path) in MEDIA_EXTENSIONS
+    return _has_extension(path, MEDIA_SUFFIXES, MEDIA_EXTENSIONS)
 
 
 def _is_video(path: str) -> bool:
-    return _file_ext(path) in VIDEO_EXTENSIONS
+    return _has_extension(path, VIDEO_SUFFIXES, VIDEO_EXTENSIONS)
 
 
 def _safe_media_response(path: str) -> FileResponse:
@@ -94,113 +128,128 @@ def _safe_media_response(path: str) -> FileResponse:
     return FileResponse(path, media_type=media_type)
 
 
-def _unique_destination_path(directory: str, filename: str) -> str:
-    base, ext = os.path.splitext(filename)
-    candidate = os.path.join(directory, filename)
-    if not os.path.exists(candidate):
-        return candidate
-    i = 2
-    while True:
-        candidate = os.path.join(directory, f"{base} ({i}){ext}")
-        if not os.path.exists(candidate):
-            return candidate
-        i += 1
+def _stat_file(path: str) -> Optional[os.stat_result]:
+    """Single stat per request: returns the stat_result for a regular file, else None."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st if stat.S_ISREG(st.st_mode) else None
 
 
-def _thumbnail_cache_path(path: str, size: int) -> str:
+def _thumbnail_cache_path(path: str, size: int, st: Optional[os.stat_result] = None) -> str:
+    # st: the caller's stat_result for path, to avoid stat-ing the same file again
     try:
-        stat = os.stat(path)
-        cache_key = f"{THUMB_CACHE_VERSION}|{os.path.abspath(path)}|{size}|{stat.st_mtime_ns}|{stat.st_size}"
+        if st is None:
+            st = os.stat(path)
+        cache_key = f"{THUMB_CACHE_VERSION}|{_normalize_abs(path)}|{size}|{st.st_mtime_ns}|{st.st_size}"
     except OSError:
-        cache_key = f"{THUMB_CACHE_VERSION}|{os.path.abspath(path)}|{size}|missing"
-    digest = hashlib.sha1(cache_key.encode("utf-8")).hexdigest()
+        cache_key = f"{THUMB_CACHE_VERSION}|{_normalize_abs(path)}|{size}|missing"
+    # Non-cryptographic lookup key: BLAKE2b is faster than SHA-1 and stdlib
+    digest = hashlib.blake2b(cache_key.encode("utf-8"), digest_size=16).hexdigest()
     return os.path.join(THUMB_CACHE_DIR, f"{digest}.jpg")
 
 
-def _create_image_thumbnail(src_path: str, dst_path: str, size: int, quality: int = 62) -> bool:
+def _read_small_thumbnail(cache_path: str) -> Optional[bytes]:
+    """
+    LRU of small cache files, bounded by total bytes. Cache files are content-keyed (source
+    mtime/size are in the name) and written by rename, so cached bytes are never partial or stale.
+    Only touched from async routes, i.e. the event loop thread.
+    """
+    global _thumb_memory_bytes
+    data = _thumb_memory.get(cache_path)
+    if data is not None:
+        _thumb_memory.move_to_end(cache_path)
+        return data
     try:
-        with Image.open(src_path) as img:
-            img = ImageOps.exif_transpose(img)
-            if img.mode not in ("RGB", "L"):
-                img = img.convert("RGB")
-            elif img.mode == "L":
-                img = img.convert("RGB")
-            img.thumbnail((size, size))
-            img.save(dst_path, format="JPEG", quality=quality, optimize=False)
-        return True
-    except (UnidentifiedImageError, OSError, ValueError):
-        return False
+        with open(cache_path, "rb") as f:
+            if os.fstat(f.fileno()).st_size > THUMB_MEMORY_MAX_BYTES:
+                return None
+            data = f.read(THUMB_MEMORY_MAX_BYTES + 1)
+    except OSError:
+        return None
+    if len(data) > THUMB_MEMORY_MAX_BYTES:
+        return None
+    _thumb_memory[cache_path] = data
+    _thumb_memory_bytes += len(data)
+    while _thumb_memory_bytes > THUMB_MEMORY_BUDGET_BYTES:
+        _, evicted = _thumb_memory.popitem(last=False)
+        _thumb_memory_bytes -= len(evicted)
+    return data
 
 
-def _create_video_thumbnail(src_path: str, dst_path: str, size: int, quality: int = 4) -> bool:
-    ffmpeg_cmd = [
-        "ffmpeg",
-        "-hide_banner",
-        "-loglevel",
-        "error",
-        "-ss",
-        "00:00:01",
-        "-i",
-        src_path,
-        "-frames:v",
-        "1",
-        "-vf",
-        f"scale={size}:-1:force_original_aspect_ratio=decrease",
-        "-q:v",
-        str(quality),
-        "-y",
-        dst_path,
-    ]
-    try:
-        result = subprocess.run(ffmpeg_cmd, capture_output=True, timeout=12, check=False)
-        return result.returncode == 0 and os.path.isfile(dst_path)
-    except (OSError, subprocess.SubprocessError):
-        return False
+def _cached_thumbnail_response(request: Request, cache_path: str) -> Response:
+    """Serves a thumbnail cache file from memory when small, answering ETag revalidation with 304."""
+    etag = f'"{os.path.splitext(os.path.basename(cache_path))[0]}"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=86400"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    content = _read_small_thumbnail(cache_path)
+    if content is None:
+        return FileResponse(cache_path, media_type="image/jpeg", headers=headers)
+    return Response(content=content, media_type="image/jpeg", headers=headers)
+
+
+THUMB_WARM_SIZE = 160 # Date Fixer grid thumbnail size
+# Leave a core for ffmpeg and the server; Windows caps ProcessPoolExecutor at 61 workers.
+THUMB_WARM_WORKERS = max(1, min((os.cpu_count() or 1) - 1, 61))
+_thumb_warm_pool: Optional[ProcessPoolExecutor] = None
+_thumb_warm_pool_lock = threading.Lock()
+
+
+def _log_future_error(future) -> None:
+    # Fire-and-forget background work: surface failures instead of dropping them with the future.
+    if not future.cancelled() and future.exception() is not None:
+        logger.error("Background thumbnail warm-up failed", exc_info=future.exception())
+
+
+def _queue_thumbnail_warmup(paths: List[str], size: int = THUMB_WARM_SIZE) -> None:
+    """Queues background thumbnail generation for paths that have no cached (or failed) thumbnail."""
+    global _thumb_warm_pool
+    with _thumb_warm_pool_lock:
+        # Concurrent scans run this from separate executor threads; create the pool once.
+        if _thumb_warm_pool is None:
+            _thumb_warm_pool = ProcessPoolExecutor(max_workers=THUMB_WARM_WORKERS)
+    for path in paths:
+        cache_path = _thumbnail_cache_path(path, size)
+        if os.path.isfile(cache_path) or thumbnail_failed_recently(cache_path):
+            continue
+        _thumb_warm_pool.submit(warm_thumbnail, path, cache_path, size, _is_video(path)).add_done_callback(
+            _log_future_error
+        )
 
 
+_RECOMMEND_POSITIVE_TOKENS = ("dcim", "camera", "photos", "pictures", "original", "iphone", "android")
+_RECOMMEND_NEGATIVE_TOKENS = (
+    "edited", "edit", "whatsapp", "telegram", "download", "cache", "temp", "export",
+    "backup", "compressed", "thumbnail", "thumb", "preview",
+)
+_NOISY_NAME_RE = re.compile(r"\(\d+\)|copy|kopya|duplicate|dupe", re.IGNORECASE)
+_PREFIX_RE = re.compile(r"^(img_|dsc_|vid_|pxl_|mvimg_)")
 
-def _create_media_thumbnail(src_path: str, dst_path: str, size: int, quality: int = 62) -> bool:
-    if _is_video(src_path):
-        return _create_video_thumbnail(src_path, dst_path, size, quality=4)
 
-    if _create_image_thumbnail(src_path, dst_path, size, quality=quality):
-        return True
+def _prefetch_mtimes(paths: List[str]) -> Dict[str, float]:
+    """Stats paths on a thread pool; unreadable files are left out."""
+    def mtime(path: str) -> Optional[float]:
+        try:
+            return os.stat(path).st_mtime
+        except OSError:
+            return None
 
-    # Fallback for formats Pillow may not decode (HEIC/RAW variants).
-    ffmpeg_cmd = [
-        "ffmpeg",
-        "-hide_banner",
-        "-loglevel",
-        "error",
-        "-i",
-        src_path,
-        "-frames:v",
-        "1",
-        "-vf",
-        f"scale={size}:-1:force_original_aspect_ratio=decrease",
-        "-q:v",
-        "4",
-        "-y",
-        dst_path,
-    ]
-    try:
-        result = subprocess.run(ffmpeg_cmd, capture_output=True, timeout=12, check=False)
-        return result.returncode == 0 and os.path.isfile(dst_path)
-    except (OSError, subprocess.SubprocessError):
-        return False
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        return {
+            path: value
+            for path, value in zip(paths, pool.map(mtime, paths))
+            if value is not None
+        }
 
 
-def _choose_recommended_file(files: List[FileEntry]) -> Optional[FileEntry]:
+def _choose_recommended_file(
+    files: List[FileEntry], mtimes: Optional[Dict[str, float]] = None
+) -> Optional[FileEntry]:
     if not files:
         return None
 
-    positive_tokens = ("dcim", "camera", "photos", "pictures", "original", "iphone", "android")
-    negative_tokens = (
-        "edited", "edit", "whatsapp", "telegram", "download", "cache", "temp", "export",
-        "backup", "compressed", "thumbnail", "thumb", "preview",
-    )
-    noisy_name = re.compile(r"\(\d+\)|copy|kopya|duplicate|dupe", re.IGNORECASE)
-
     def score(file_entry: FileEntry):
         path = (file_entry.path or "").lower()
         name = (file_entry.filename or os.path.basename(file_entry.path) or "").lower()
@@ -214,29 +263,38 @@ def _choose_recommended_file(files: List[FileEntry]) -> Optional[FileEntry]:
         else:
             points += 10
 
-        if re.match(r"^(img_|dsc_|vid_|pxl_|mvimg_)", name):
+        if _PREFIX_RE.match(name):
             points += 6
 
-        for token in positive_tokens:
+        for token in _RECOMMEND_POSITIVE_TOKENS:
             if token in path:
                 points += 4
-        for token in negative_tokens:
+        for token in _RECOMMEND_NEGATIVE_TOKENS:
             if token in path or token in name:
                 points -= 6
-        if noisy_name.search(name):
+        if _NOISY_NAME_RE.search(name):
             points -= 4
 
         depth = path.count("\\") + path.count("/")
-        try:
-            st = os.stat(file_entry.path)
-            older_priority = -st.st_mtime
-        except OSError:
-            older_priority = float("-inf")
+        if mtimes is None:
+            try:
+                older_priority = -os.stat(file_entry.path).st_mtime
+            except OSError:
+                older_priority = float("-inf")
+        else:
+            mtime = mtimes.get(file_entry.path)
+            older_priority = -mtime if mtime is not None else float("-inf")
 
         return (points, -depth, older_priority, -len(name))
 
     return max(files, key=score)
 
+@app.on_event("shutdown")
+def _stop_thumbnail_warmup() -> None:
+    # Don't hold shutdown hostage to a long warm-up queue.
+    if _thumb_warm_pool is not None:
+        _thumb_warm_pool.shutdown(wait=False, cancel_futures=True)
+
 # Dependency
 def get_db():
     db = SessionLocal()
@@ -250,37 +308,48 @@ def read_root():
     return FileResponse('app/static/index.html')
 
 @app.post("/api/scan")
-async def scan_directory(path: str, db: Session = Depends(get_db)):
+def scan_directory(path: str, db: Session = Depends(get_db)):
     normalized_root = _normalize_abs(path)
     if not os.path.exists(normalized_root):
         raise HTTPException(status_code=400, detail="Path does not exist")
     
     try:
-        ALLOWED_SOURCE_ROOTS.clear()
+        _clear_allowed_roots()
         _register_allowed_root(normalized_root)
 
+        # Walk + hash before touching the DB: the SQLite write lock is only held for the short
+        # clear + insert below, and a failed scan keeps the previous results
+        scanner = FileScanner()
+        results = scanner.scan_directory(normalized_root)
+        
         # Clear previous results - clear FileEntries first due to foreign key
         db.query(FileEntry).delete()
         db.query(DuplicateGroup).delete()
-        db.commit()
-        
-        scanner = FileScanner()
-        results = await scanner.scan_directory(normalized_root)
         
-        # Save to DB
-        for hash_val, files in results.items():
-            group = DuplicateGroup(hash_value=hash_val, file_size=files[0]['size'])
-            db.add(group)
-            db.flush() # Flush to get ID without full commit
-            
-            for f in files:
-                entry = FileEntry(
-                    path=f['path'], 
-                    filename=f['name'], 
-                    group_id=group.id,
-                    is_original=False 
-                )
-                db.add(entry)
+        # Save to DB - Core executemany inserts skip the ORM unit of work entirely
+        group_rows = [
+            {"hash_value": hash_val, "file_size": files[0]['size']}
+            for hash_val, files in results.items()
+        ]
+        group_ids = []
+        if group_rows:
+            group_ids = db.execute(
+                insert(DuplicateGroup).returning(DuplicateGroup.id, sort_by_parameter_order=True),
+                group_rows,
+            ).scalars().all()
+
+        entry_rows = [
+            {
+                "path": f['path'],
+                "filename": f['name'],
+                "group_id": group_id,
+                "is_original": False,
+            }
+            for group_id, files in zip(group_ids, results.values())
+            for f in files
+        ]
+        if entry_rows:
+            db.execute(insert(FileEntry), entry_rows)
         
         db.commit()
         return {"status": "completed", "groups_found": len(results)}
@@ -291,7 +360,7 @@ async def scan_directory(path: str, db: Session = Depends(get_db)):
 
 @app.get("/api/duplicates")
 def get_duplicates(db: Session = Depends(get_db)):
-    groups = db.query(DuplicateGroup).all()
+    groups = db.query(DuplicateGroup).options(selectinload(DuplicateGroup.files)).all()
     # Serialize manually for simplicity or use Pydantic models
     data = []
     for g in groups:
@@ -312,10 +381,16 @@ def get_duplicates_page(offset: int = 0, limit: int = 32, db: Session = Depends(
     offset = max(0, offset)
     limit = max(1, min(limit, 250))
 
-    total = db.query(DuplicateGroup).count()
-    selected_originals = db.query(FileEntry).filter(FileEntry.is_original == True).count()
+    # Both counters in one round-trip; scalar subqueries avoid the row fan-out of a join
+    total, selected_originals = db.execute(
+        select(
+            select(func.count(DuplicateGroup.id)).scalar_subquery(),
+            select(func.count(FileEntry.id)).where(FileEntry.is_original == True).scalar_subquery(),
+        )
+    ).one()
     groups = (
         db.query(DuplicateGroup)
+        .options(selectinload(DuplicateGroup.files))
         .order_by(DuplicateGroup.id)
         .offset(offset)
         .limit(limit)
@@ -342,10 +417,12 @@ def mark_original(file_id: int, db: Session = Depends(get_db)):
     if not file_entry:
         raise HTTPException(status_code=404, detail="File not found")
     
-    # Unmark others in group
-    group_files = db.query(FileEntry).filter(FileEntry.group_id == file_entry.group_id).all()
-    for f in group_files:
-        f.is_original = False
+    # Unmark others in group (single set-based UPDATE instead of loading the group)
+    db.query(FileEntry).filter(
+        FileEntry.group_id == file_entry.group_id, FileEntry.id != file_entry.id
+    ).update(
+        {FileEntry.is_original: False}, synchronize_session=False
+    )
     
     file_entry.is_original = True
     db.commit()
@@ -354,11 +431,12 @@ def mark_original(file_id: int, db: Session = Depends(get_db)):
 
 @app.post("/api/recommend_originals")
 def recommend_originals(db: Session = Depends(get_db)):
-    groups = db.query(DuplicateGroup).all()
+    groups = db.query(DuplicateGroup).options(selectinload(DuplicateGroup.files)).all()
     updated_groups = 0
+    mtimes = _prefetch_mtimes([f.path for g in groups for f in g.files])
 
     for group in groups:
-        recommended = _choose_recommended_file(group.files)
+        recommended = _choose_recommended_file(group.files, mtimes)
         if not recommended:
             continue
 
@@ -370,36 +448,46 @@ def recommend_originals(db: Session = Depends(get_db)):
     db.commit()
     return {"status": "ok", "updated_groups": updated_groups}
 
+EXPORT_COPY_WORKERS = 8
+
+
+def _export_copy(job: Tuple[str, str]) -> bool:
+    # SAFETY EXPORT: Copy original to Target (never a hardlink, which would share the source inode)
+    src_path, dest_path = job
+    try:
+        shutil.copy2(src_path, dest_path)
+        # NO DELETION - SOURCE REMAINS UNTOUCHED
+        return True
+    except Exception:
+        # Keep loop alive; report only final processed count for privacy.
+        return False
+
 @app.post("/api/commit_cleanup")
 def commit_cleanup(export_path: str, db: Session = Depends(get_db)):
     normalized_export_path = _normalize_abs(export_path)
     if not os.path.exists(normalized_export_path):
         raise HTTPException(status_code=400, detail="Export path not found")
+    if not os.path.isdir(normalized_export_path):
+        raise HTTPException(status_code=400, detail="Export path is not a directory")
         
-    groups = db.query(DuplicateGroup).all()
-    processed_count = 0
+    groups = db.query(DuplicateGroup).options(selectinload(DuplicateGroup.files)).all()
+    # One listing of the export dir replaces per-candidate existence probes
+    known_names = known_destination_names(normalized_export_path)
     
+    # Destination names are reserved up front (naming is order dependent), then copied in parallel
+    copy_jobs = []
     for group in groups:
         original = next((f for f in group.files if f.is_original), None)
         if not original:
             continue # Skip groups where no original is selected
+        if not _is_allowed_source_path(original.path):
+            continue
+        original_name = original.filename or os.path.basename(original.path)
+        dest_path = unique_destination_path(normalized_export_path, original_name, known_names)
+        copy_jobs.append((original.path, dest_path))
             
-        # SAFETY EXPORT: Copy original to Target
-        try:
-            if not _is_allowed_source_path(original.path):
-                continue
-            original_name = original.filename or os.path.basename(original.path)
-            dest_path = _unique_destination_path(normalized_export_path, original_name)
-            
-            shutil.copy2(original.path, dest_path)
-            
-            # NO DELETION - SOURCE REMAINS UNTOUCHED
-            
-            processed_count += 1
-            
-        except Exception:
-            # Keep loop alive; report only final processed count for privacy.
-            pass
+    with ThreadPoolExecutor(max_workers=EXPORT_COPY_WORKERS) as pool:
+        processed_count = sum(pool.map(_export_copy, copy_jobs))
             
     # Cleanup DB - we are done with this session
     db.query(DuplicateGroup).delete()
@@ -415,50 +503,98 @@ class DateUpdateRequest(BaseModel):
     manual_date: Optional[str] = None
     export_path: Optional[str] = None
 
+METADATA_SCAN_CONCURRENCY = 32
+
+
+def _list_dir(path: str) -> List[os.DirEntry]:
+    with os.scandir(path) as it:
+        return list(it)
+
+
+def _probe_metadata_entry(service: MetadataService, entry: os.DirEntry) -> Optional[dict]:
+    f_path = entry.path
+    if not _is_media(f_path):
+        return None
+    try:
+        if not entry.is_file():
+            return None
+        # Get Current System Date
+        stats = entry.stat()
+    except OSError:
+        return None # removed or unreadable since the listing: skip the row
+    current_date = datetime.datetime.fromtimestamp(stats.st_ctime) # Creation time
+
+    # Predict Dates
+    exif_date = service.get_exif_date(f_path, stats)
+    name_date = service.parse_filename_date(f_path)
+
+    return {
+        "path": f_path,
+        "name": entry.name,
+        "current_date": current_date.isoformat(),
+        "exif_date": exif_date.isoformat() if exif_date else None,
+        "filename_date": name_date.isoformat() if name_date else None,
+        "has_prediction": bool(exif_date or name_date)
+    }
+
+
 @app.post("/api/metadata/scan")
-def scan_metadata(path: str):
+async def scan_metadata(path: str):
     normalized_root = _normalize_abs(path)
     if not os.path.exists(normalized_root):
         raise HTTPException(status_code=400, detail="Path does not exist")
-    ALLOWED_SOURCE_ROOTS.clear()
+    _clear_allowed_roots()
     _register_allowed_root(normalized_root)
     
-    service = MetadataService()
-    files_data = []
-    
-    for entry in os.scandir(normalized_root):
-        if entry.is_file():
-            f_path = entry.path
-            if not _is_media(f_path):
-                continue
-            
-            # Get Current System Date
-            stats = entry.stat()
-            current_date = datetime.datetime.fromtimestamp(stats.st_ctime) # Creation time
-            
-            # Predict Dates
-            exif_date = service.get_exif_date(f_path)
-            name_date = service.parse_filename_date(f_path)
-            
-            files_data.append({
-                "path": f_path,
-                "name": entry.name,
-                "current_date": current_date.isoformat(),
-                "exif_date": exif_date.isoformat() if exif_date else None,
-                "filename_date": name_date.isoformat() if name_date else None,
-                "has_prediction": bool(exif_date or name_date)
-            })
-
-    files_data.sort(key=lambda x: x["name"].lower())
-    return files_data
+    service = MetadataService() # read-only, safe to share across threads
+    # Listing a large or network folder blocks: keep it off the event loop
+    entries = await asyncio.to_thread(_list_dir, normalized_root)
+
+    async def stream_entries():
+        # NDJSON in completion order: the first rows reach the client while the rest are probed.
+        # EXIF reads are seek/read bound: overlap them in threads, capped to avoid FD exhaustion.
+        loop = asyncio.get_running_loop()
+        pending_entries = iter(entries)
+        in_flight = set()
+        warm_paths = []
+
+        def top_up() -> None:
+            while len(in_flight) < METADATA_SCAN_CONCURRENCY:
+                entry = next(pending_entries, None)
+                if entry is None:
+                    return
+                in_flight.add(loop.run_in_executor(None, _probe_metadata_entry, service, entry))
+
+        top_up()
+        while in_flight:
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            in_flight.difference_update(done)
+            top_up()
+            lines = []
+            for task in done:
+                item = task.result()
+                if item is None:
+                    continue
+                if item["has_prediction"]:
+                    warm_paths.append(item["path"])
+                lines.append(json.dumps(item) + "\n")
+            if lines:
+                yield "".join(lines)
+
+        # Warm grid thumbnails in the background (process pool: decode runs on every core).
+        loop.run_in_executor(None, _queue_thumbnail_warmup, warm_paths).add_done_callback(_log_future_error)
+
+    # Rows are unordered; the client sorts by name once the stream ends.
+    return StreamingResponse(stream_entries(), media_type="application/x-ndjson")
 
 @app.get("/api/metadata/preview")
-def metadata_preview(path: str):
+async def metadata_preview(request: Request, path: str):
     if not path:
         raise HTTPException(status_code=400, detail="Path is required")
 
-    normalized_path = os.path.abspath(path)
-    if not os.path.isfile(normalized_path):
+    normalized_path = _normalize_abs(path)
+    source_stat = _stat_file(normalized_path)
+    if source_stat is None:
         raise HTTPException(status_code=404, detail="File not found")
     if not _is_allowed_source_path(normalized_path):
         raise HTTPException(status_code=403, detail="Path is not in allowed scanned roots")
@@ -470,21 +606,24 @@ def metadata_preview(path: str):
         return _safe_media_response(normalized_path)
 
     preview_size = 900
-    preview_cache = _thumbnail_cache_path(normalized_path, preview_size)
+    preview_cache = _thumbnail_cache_path(normalized_path, preview_size, source_stat)
     if not os.path.isfile(preview_cache):
-        ok = _create_media_thumbnail(normalized_path, preview_cache, preview_size, quality=74)
+        if thumbnail_failed_recently(preview_cache):
+            raise HTTPException(status_code=415, detail="Preview generation failed previously")
+        ok = await create_media_thumbnail_async(normalized_path, preview_cache, preview_size, False, quality=74)
         if not ok:
             raise HTTPException(status_code=500, detail="Preview generation failed")
-    return FileResponse(preview_cache, media_type="image/jpeg")
+    return _cached_thumbnail_response(request, preview_cache)
 
 
 @app.get("/api/metadata/thumbnail")
-def metadata_thumbnail(path: str, size: int = 240):
+async def metadata_thumbnail(request: Request, path: str, size: int = 240):
     if not path:
         raise HTTPException(status_code=400, detail="Path is required")
 
-    normalized_path = os.path.abspath(path)
-    if not os.path.isfile(normalized_path):
+    normalized_path = _normalize_abs(path)
+    source_stat = _stat_file(normalized_path)
+    if source_stat is None:
         raise HTTPException(status_code=404, detail="File not found")
     if not _is_allowed_source_path(normalized_path):
         raise HTTPException(status_code=403, detail="Path is not in allowed scanned roots")
@@ -493,14 +632,16 @@ def metadata_thumbnail(path: str, size: int = 240):
         raise HTTPException(status_code=400, detail="Unsupported media format")
 
     size = max(96, min(size, 512))
-    cache_path = _thumbnail_cache_path(normalized_path, size)
+    cache_path = _thumbnail_cache_path(normalized_path, size, source_stat)
 
     if not os.path.isfile(cache_path):
-        ok = _create_media_thumbnail(normalized_path, cache_path, size, quality=62)
+        if thumbnail_failed_recently(cache_path):
+            raise HTTPException(status_code=415, detail="Thumbnail generation failed previously")
+        ok = await create_media_thumbnail_async(normalized_path, cache_path, size, _is_video(normalized_path), quality=62)
         if not ok:
             raise HTTPException(status_code=500, detail="Thumbnail generation failed")
 
-    return FileResponse(cache_path, media_type="image/jpeg")
+    return _cached_thumbnail_response(request, cache_path)
 
 @app.post("/api/metadata/apply")
 def apply_metadata_changes(req: DateUpdateRequest):
@@ -515,6 +656,8 @@ def apply_metadata_changes(req: DateUpdateRequest):
 
     service = MetadataService()
     results = {"success": 0, "failed": 0, "errors": []}
+    # One listing of the export dir replaces per-file existence probes for name collisions
+    known_names = known_destination_names(normalized_export_path)
     
     for path in req.files:
         normalized_source_path = _normalize_abs(path)
@@ -527,7 +670,10 @@ def apply_metadata_changes(req: DateUpdateRequest):
             results["errors"].append(f"{os.path.basename(path)}: unsupported media format")
             continue
         # Pass export_path as destination
-        ok, msg = service.apply_date_to_file(normalized_source_path, req.mode, req.manual_date, destination_path=normalized_export_path)
+        ok, msg = service.apply_date_to_file(
+            normalized_source_path, req.mode, req.manual_date,
+            destination_path=normalized_export_path, known_names=known_names,
+        )
         if ok:
             results["success"] += 1
         else: